@@ -1,16 +1,96 @@
 #!/usr/bin/env python3
 """A module for encrypting passwords.
 """
+import os
+import time
 import bcrypt
+from functools import lru_cache
+from statistics import median
+from typing import Tuple, Union
+
+
+MIN_ROUNDS, MAX_ROUNDS = (4, 31)
+SECURE_ROUNDS = 10
+PROBES = 5
+
+
+def calibrate_rounds(target_ms: float, probe_rounds: int = 8) -> int:
+    """Finds the highest bcrypt cost whose hashing time on this
+    host stays within the given number of milliseconds, going no
+    lower than SECURE_ROUNDS.
+    """
+    salt = bcrypt.gensalt(probe_rounds)
+    samples = []
+    for _ in range(PROBES):
+        start = time.perf_counter()
+        bcrypt.hashpw(b'calibration', salt)
+        samples.append((time.perf_counter() - start) * 1000)
+    elapsed_ms = median(samples)
+    rounds = probe_rounds
+    while rounds < MAX_ROUNDS and elapsed_ms * 2 <= target_ms:
+        rounds, elapsed_ms = (rounds + 1, elapsed_ms * 2)
+    while rounds > MIN_ROUNDS and elapsed_ms > target_ms:
+        rounds, elapsed_ms = (rounds - 1, elapsed_ms / 2)
+    return max(rounds, SECURE_ROUNDS)
+
+
+@lru_cache(maxsize=None)
+def get_rounds() -> int:
+    """Retrieves the bcrypt cost to hash passwords with, either from
+    `BCRYPT_ROUNDS` or calibrated for `BCRYPT_TARGET_MS`.
+    """
+    try:
+        rounds = int(os.environ["BCRYPT_ROUNDS"])
+        return min(max(rounds, MIN_ROUNDS), MAX_ROUNDS)
+    except Exception:
+        pass
+    try:
+        target_ms = float(os.getenv("BCRYPT_TARGET_MS", "50"))
+    except Exception:
+        target_ms = 50
+    return calibrate_rounds(target_ms)
+
+
+def hash_cost(hashed_password: Union[bytes, str]) -> int:
+    """Retrieves the bcrypt cost a password was hashed with.
+    """
+    if isinstance(hashed_password, str):
+        hashed_password = hashed_password.encode('utf-8')
+    try:
+        return int(hashed_password.split(b'$')[2])
+    except Exception:
+        return 0
 
 
 def hash_password(password: str) -> bytes:
     """Hashes a password using a random salt.
     """
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    salt = bcrypt.gensalt(get_rounds())
+    return bcrypt.hashpw(password.encode('utf-8'), salt)
 
 
 def is_valid(hashed_password: bytes, password: str) -> bool:
     """Checks is a hashed password was formed from the given password.
     """
     return bcrypt.checkpw(password.encode('utf-8'), hashed_password)
+
+
+def needs_rehash(hashed_password: bytes) -> bool:
+    """Checks if a hashed password's cost is below the current one,
+    or more than one round above it.
+    """
+    cost, rounds = (hash_cost(hashed_password), get_rounds())
+    return cost < rounds or cost > rounds + 1
+
+
+def verify_and_update(
+        hashed_password: bytes, password: str,
+        ) -> Tuple[bool, Union[bytes, None]]:
+    """Checks a password and, when it's valid but was hashed with
+    another cost, hashes it again with the current one.
+    """
+    if not is_valid(hashed_password, password):
+        return (False, None)
+    if needs_rehash(hashed_password):
+        return (True, hash_password(password))
+    return (True, None)
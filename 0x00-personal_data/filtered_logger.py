@@ -3,9 +3,21 @@
 """
 import os
 import re
+import csv
+import time
+import queue
+import atexit
+import threading
 import logging
 import mysql.connector
-from typing import List
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing, contextmanager
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict, Iterable, List, TextIO, Tuple, Union
 
 
 patterns = {
@@ -13,6 +25,129 @@ patterns = {
     'replace': lambda x: r'\g<field>={}'.format(x),
 }
 PII_FIELDS = ("name", "email", "phone", "ssn", "password")
+USER_COLUMNS = (
+    "name", "email", "phone", "ssn", "password",
+    "ip", "last_login", "user_agent",
+)
+
+
+class Redactor:
+    """Redacts the values of a set of fields in log lines
+    with a regex compiled once.
+    """
+
+    def __init__(
+            self, fields: Tuple[str, ...], redaction: str, separator: str,
+            ) -> None:
+        extract, replace = (patterns["extract"], patterns["replace"])
+        self.regex = re.compile(extract(fields, separator))
+        self.replacement = replace(redaction)
+        if '\\' not in redaction:
+            suffix = '={}'.format(redaction)
+            self.replacement = lambda x: x.group('field') + suffix
+
+    def redact(self, message: str) -> str:
+        """Redacts a log line.
+        """
+        return self.regex.sub(self.replacement, message)
+
+
+class TokenRedactor:
+    """Redacts the values of a set of fields in log lines
+    by splitting them on the separator once.
+    """
+
+    def __init__(
+            self, fields: Tuple[str, ...], redaction: str, separator: str,
+            ) -> None:
+        self.fields = frozenset(fields)
+        self.lengths = tuple(sorted({len(x) for x in fields}, reverse=True))
+        self.separator = separator
+        self.pairs = TokenRedactor.expand(fields, redaction, separator)
+
+    @staticmethod
+    def expand(
+            fields: Tuple[str, ...], redaction: str, separator: str,
+            value: str = '',
+            ) -> Dict[str, str]:
+        """Redacts a pair holding the given value for each field
+        with the regex engine.
+        """
+        regex = re.compile(patterns["extract"](fields, separator))
+        replacement = patterns["replace"](redaction)
+        return {x: regex.sub(replacement, x + '=' + value) for x in fields}
+
+    @staticmethod
+    def supports(
+            fields: Tuple[str, ...], redaction: str, separator: str,
+            ) -> bool:
+        """Checks if this engine gives the same output as the regex
+        one for the given fields, redaction and separator.
+        """
+        if not fields or len(separator) != 1:
+            return False
+        if re.match(r'[\w=\\]', separator):
+            return False
+        if not all(re.fullmatch(r'\w+', x) for x in fields):
+            return False
+        try:
+            pairs = TokenRedactor.expand(fields, redaction, separator)
+            values = TokenRedactor.expand(fields, redaction, separator, 'v')
+        except re.error:
+            return False
+        return pairs == values
+
+    def redact(self, message: str) -> str:
+        """Redacts a log line.
+        """
+        tokens = message.split(self.separator)
+        for i, token in enumerate(tokens):
+            j = token.find('=')
+            if j == -1:
+                continue
+            field = token[:j].lstrip()
+            if field not in self.fields:
+                field = self._find_field(token, j)
+            while field is None:
+                j = token.find('=', j + 1)
+                if j == -1:
+                    break
+                field = self._find_field(token, j)
+            if field is not None:
+                tokens[i] = token[:j - len(field)] + self.pairs[field]
+        return self.separator.join(tokens)
+
+    def _find_field(self, token: str, end: int) -> Union[str, None]:
+        """Finds the longest field a token has right before
+        the given index.
+        """
+        for n in self.lengths:
+            if n <= end and token[end - n:end] in self.fields:
+                return token[end - n:end]
+        return None
+
+
+REDACTORS = {
+    'regex': Redactor,
+    'token': TokenRedactor,
+}
+
+
+@lru_cache(maxsize=64)
+def get_redactor(
+        fields: Tuple[str, ...], redaction: str, separator: str,
+        engine: str = 'regex',
+        ) -> Union[Redactor, TokenRedactor]:
+    """Retrieves the redactor of a (fields, redaction, separator)
+    combination, creating it the first time. The token engine falls
+    back to the regex one when it can't match its output.
+    """
+    if engine not in REDACTORS:
+        raise ValueError('Unknown redaction engine: {}'.format(engine))
+    if engine == 'token' and not TokenRedactor.supports(
+            fields, redaction, separator):
+        engine = 'regex'
+    return REDACTORS[engine](fields, redaction, separator)
 
 
 def filter_datum(
@@ -20,11 +155,69 @@ def filter_datum(
         ) -> str:
     """Filters a log line.
     """
-    extract, replace = (patterns["extract"], patterns["replace"])
-    return re.sub(extract(fields, separator), replace(redaction), message)
+    redactor = get_redactor(tuple(fields), redaction, separator)
+    return redactor.redact(message)
 
 
-def get_logger() -> logging.Logger:
+class BoundedQueueHandler(QueueHandler):
+    """Hands log records over to a bounded queue, either blocking
+    or dropping them when it's full.
+    """
+
+    def __init__(self, log_queue: queue.Queue, drop: bool = False) -> None:
+        super(BoundedQueueHandler, self).__init__(log_queue)
+        self.drop = drop
+        self.dropped = 0
+        self.listener = None
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Adds a log record to the queue.
+        """
+        if not self.drop:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BoundedQueueListener(QueueListener):
+    """Passes the log records of a bounded queue to its handlers
+    on a background thread.
+    """
+
+    def enqueue_sentinel(self) -> None:
+        """Waits for room in the queue to add the stop marker.
+        """
+        self.queue.put(self._sentinel)
+
+    def stop(self) -> None:
+        """Handles the records left in the queue and stops the thread.
+        """
+        if self._thread is not None:
+            super(BoundedQueueListener, self).stop()
+
+
+def get_queue_handler(*handlers: logging.Handler) -> BoundedQueueHandler:
+    """Creates a queue handler whose records are passed to the given
+    handlers on a listener thread.
+    """
+    try:
+        size = int(os.getenv("PERSONAL_DATA_LOG_QUEUE_SIZE", "10000"))
+    except Exception:
+        size = 10000
+    overflow = os.getenv("PERSONAL_DATA_LOG_OVERFLOW", "block")
+    log_queue = queue.Queue(max(size, 1))
+    queue_handler = BoundedQueueHandler(log_queue, overflow == "drop")
+    queue_handler.listener = BoundedQueueListener(
+        log_queue, *handlers, respect_handler_level=True)
+    queue_handler.listener.start()
+    atexit.register(queue_handler.listener.stop)
+    return queue_handler
+
+
+def get_logger(asynchronous: bool = None) -> logging.Logger:
     """Creates a new logger for user data.
     """
     logger = logging.getLogger("user_data")
@@ -32,7 +225,12 @@ def get_logger() -> logging.Logger:
     stream_handler.setFormatter(RedactingFormatter(PII_FIELDS))
     logger.setLevel(logging.INFO)
     logger.propagate = False
-    logger.addHandler(stream_handler)
+    if asynchronous is None:
+        asynchronous = os.getenv("PERSONAL_DATA_LOG_ASYNC", "") == "true"
+    if asynchronous:
+        logger.addHandler(get_queue_handler(stream_handler))
+    else:
+        logger.addHandler(stream_handler)
     return logger
 
 
@@ -43,9 +241,13 @@ def get_db() -> mysql.connector.connection.MySQLConnection:
     db_name = os.getenv("PERSONAL_DATA_DB_NAME", "")
     db_user = os.getenv("PERSONAL_DATA_DB_USERNAME", "root")
     db_pwd = os.getenv("PERSONAL_DATA_DB_PASSWORD", "")
+    try:
+        db_port = int(os.getenv("PERSONAL_DATA_DB_PORT", "3306"))
+    except Exception:
+        db_port = 3306
     connection = mysql.connector.connect(
         host=db_host,
-        port=3306,
+        port=db_port,
         user=db_user,
         password=db_pwd,
         database=db_name,
@@ -53,26 +255,289 @@ def get_db() -> mysql.connector.connection.MySQLConnection:
     return connection
 
 
-def main():
+class ConnectionPool:
+    """A pool of reusable DB-API connections.
+    """
+
+    def __init__(
+            self, connect: Callable, size: int = 5,
+            idle_timeout: float = 300, ping: str = "SELECT 1",
+            ) -> None:
+        self.connect = connect
+        self.size = max(size, 1)
+        self.idle_timeout = idle_timeout
+        self.ping = ping
+        self.idle = deque()
+        self.checked_out = 0
+        self.closed = False
+        self.lock = threading.Condition()
+
+    def acquire(self, timeout: float = None):
+        """Checks out a healthy connection, waiting for one to be
+        released when the pool is full.
+        """
+        with self.lock:
+            if self.closed:
+                raise RuntimeError('Connection pool is closed')
+            ready = self.lock.wait_for(
+                lambda: self.idle or self.checked_out < self.size, timeout)
+            if not ready:
+                raise TimeoutError('No connection available')
+            self.checked_out += 1
+            idle = self.idle.pop() if self.idle else None
+        try:
+            if idle is not None:
+                connection, released_at = idle
+                is_fresh = time.monotonic() - released_at < self.idle_timeout
+                if is_fresh and self.is_healthy(connection):
+                    return connection
+                self.discard(connection)
+            return self.connect()
+        except BaseException:
+            with self.lock:
+                self.checked_out -= 1
+                self.lock.notify()
+            raise
+
+    def release(self, connection) -> None:
+        """Returns a connection to the pool.
+        """
+        try:
+            connection.rollback()
+        except Exception:
+            self.discard(connection)
+            connection = None
+        with self.lock:
+            self.checked_out -= 1
+            if connection is not None and not self.closed:
+                self.idle.append((connection, time.monotonic()))
+                connection = None
+            self.lock.notify()
+        if connection is not None:
+            self.discard(connection)
+
+    @contextmanager
+    def connection(self, timeout: float = None):
+        """Checks out a connection for the duration of a block.
+        """
+        connection = self.acquire(timeout)
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def is_healthy(self, connection) -> bool:
+        """Checks if a connection can still run queries.
+        """
+        try:
+            with closing(connection.cursor()) as cursor:
+                cursor.execute(self.ping)
+                cursor.fetchall()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def discard(connection) -> None:
+        """Closes a connection, ignoring errors from broken ones.
+        """
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        """Closes the idle connections and the pool.
+        """
+        with self.lock:
+            self.closed = True
+            idle, self.idle = (self.idle, deque())
+            self.lock.notify_all()
+        for connection, _ in idle:
+            self.discard(connection)
+
+
+@lru_cache(maxsize=None)
+def get_db_pool() -> ConnectionPool:
+    """Retrieves the shared pool of database connections.
+    """
+    try:
+        size = int(os.getenv("PERSONAL_DATA_DB_POOL_SIZE", "5"))
+    except Exception:
+        size = 5
+    try:
+        idle_timeout = float(
+            os.getenv("PERSONAL_DATA_DB_POOL_IDLE_TIMEOUT", "300"))
+    except Exception:
+        idle_timeout = 300
+    pool = ConnectionPool(get_db, size, idle_timeout)
+    atexit.register(pool.close)
+    return pool
+
+
+def iter_rows(cursor, size: int):
+    """Yields the rows of an executed query in batches of
+    the given size.
+    """
+    rows = cursor.fetchmany(size)
+    while rows:
+        yield from rows
+        rows = cursor.fetchmany(size)
+
+
+def make_record(columns: List[str], row: Tuple) -> logging.LogRecord:
+    """Creates a log record for a user row.
+    """
+    record = map(
+        lambda x: '{}={}'.format(x[0], x[1]),
+        zip(columns, row),
+    )
+    msg = '{};'.format('; '.join(list(record)))
+    args = ("user_data", logging.INFO, None, None, msg, None, None)
+    return logging.LogRecord(*args)
+
+
+def get_items(indexes: List[int]) -> Callable[[Tuple], Tuple]:
+    """Creates a function that picks the items at the given
+    indexes of a row as a tuple.
+    """
+    if len(indexes) > 1:
+        return itemgetter(*indexes)
+    return lambda x: tuple(x[i] for i in indexes)
+
+
+class _RedactedRecord(logging.LogRecord):
+    """A log record whose message a RowRedactor already redacted.
+    """
+
+
+class RowRedactor:
+    """Redacts the PII columns of user rows before their log
+    messages are built.
+    """
+
+    def __init__(
+            self, columns: List[str], fields: List[str],
+            redaction: str, separator: str,
+            ) -> None:
+        self.columns = columns
+        self.key = (tuple(fields), redaction, separator)
+        self.separator = separator
+        self.template = None
+        if not TokenRedactor.supports(*self.key):
+            return
+        if not all(re.fullmatch(r'\w+', x) for x in columns):
+            return
+        redactor = get_redactor(*self.key)
+        pairs, values, secrets = ([], [], [])
+        for i, column in enumerate(columns):
+            pair = redactor.redact('{}='.format(column))
+            if pair == '{}='.format(column):
+                pairs.append('{}={{}}'.format(column))
+                values.append(i)
+            else:
+                pairs.append(pair.replace('{', '{{').replace('}', '}}'))
+                secrets.append(i)
+        self.template = '{};'.format('; '.join(pairs))
+        self.equals = self.template.format(*[''] * len(values)).count('=')
+        self.values = get_items(values)
+        self.secrets = get_items(secrets)
+        self.secrets_template = '{}' * len(secrets)
+
+    def make_record(self, row: Tuple) -> logging.LogRecord:
+        """Creates a log record for a user row, with its PII
+        columns already redacted when possible.
+        """
+        if self.template is not None:
+            msg = self.template.format(*self.values(row))
+            secrets = self.secrets_template.format(*self.secrets(row))
+            if msg.count('=') == self.equals and (
+                    self.separator not in secrets):
+                args = ("user_data", logging.INFO, None, None, msg, None, None)
+                record = _RedactedRecord(*args)
+                record.redaction_key = self.key
+                return record
+        return make_record(self.columns, row)
+
+
+def redact_chunk(columns: List[str], rows: List[Tuple]) -> List[str]:
+    """Formats and redacts a chunk of user rows.
+    """
+    formatter = RedactingFormatter(PII_FIELDS)
+    row_redactor = RowRedactor(
+        columns, PII_FIELDS, formatter.REDACTION, formatter.SEPARATOR)
+    return [formatter.format(row_redactor.make_record(x)) for x in rows]
+
+
+def bulk_redact(
+        columns: List[str], rows: Iterable[Tuple], sink: TextIO,
+        workers: int = None, chunk_size: int = 1000,
+        ) -> int:
+    """Redacts user rows in a pool of processes and writes the
+    log lines to the sink in the order of the rows.
+    """
+    workers = workers or os.cpu_count() or 1
+    rows = iter(rows)
+    count = 0
+    pending = deque()
+    with ProcessPoolExecutor(workers) as pool:
+        chunk = list(islice(rows, chunk_size))
+        while chunk or pending:
+            if chunk:
+                pending.append(pool.submit(redact_chunk, columns, chunk))
+                chunk = list(islice(rows, chunk_size))
+            if pending and (not chunk or len(pending) >= 2 * workers):
+                lines = pending.popleft().result()
+                sink.write(''.join(x + '\n' for x in lines))
+                count += len(lines)
+    return count
+
+
+def redact_csv(path: str, sink: TextIO, workers: int = None) -> int:
+    """Redacts the users in a CSV file like user_data.csv.
+    """
+    with open(path, newline='') as file:
+        reader = csv.reader(file)
+        columns = next(reader, [])
+        return bulk_redact(columns, reader, sink, workers)
+
+
+def redact_users(connection, sink: TextIO, workers: int = None) -> int:
+    """Redacts the users in a database table.
+    """
+    query = "SELECT {} FROM users;".format(','.join(USER_COLUMNS))
+    with closing(connection.cursor()) as cursor:
+        cursor.execute(query)
+        rows = iter_rows(cursor, get_fetch_size())
+        return bulk_redact(USER_COLUMNS, rows, sink, workers)
+
+
+def get_fetch_size() -> int:
+    """Retrieves the number of rows to fetch at a time.
+    """
+    try:
+        fetch_size = int(os.getenv("PERSONAL_DATA_DB_FETCH_SIZE", "1000"))
+    except Exception:
+        fetch_size = 1000
+    return max(fetch_size, 1)
+
+
+def main(connection=None):
     """Logs the information about user records in a table.
     """
-    fields = "name,email,phone,ssn,password,ip,last_login,user_agent"
-    columns = fields.split(',')
-    query = "SELECT {} FROM users;".format(fields)
+    if connection is None:
+        with get_db_pool().connection() as connection:
+            return main(connection)
+    query = "SELECT {} FROM users;".format(','.join(USER_COLUMNS))
     info_logger = get_logger()
-    connection = get_db()
-    with connection.cursor() as cursor:
+    row_redactor = RowRedactor(
+        USER_COLUMNS, PII_FIELDS,
+        RedactingFormatter.REDACTION, RedactingFormatter.SEPARATOR,
+    )
+    with closing(connection.cursor()) as cursor:
         cursor.execute(query)
-        rows = cursor.fetchall()
-        for row in rows:
-            record = map(
-                lambda x: '{}={}'.format(x[0], x[1]),
-                zip(columns, row),
-            )
-            msg = '{};'.format('; '.join(list(record)))
-            args = ("user_data", logging.INFO, None, None, msg, None, None)
-            log_record = logging.LogRecord(*args)
-            info_logger.handle(log_record)
+        for row in iter_rows(cursor, get_fetch_size()):
+            info_logger.handle(row_redactor.make_record(row))
 
 
 class RedactingFormatter(logging.Formatter):
@@ -84,15 +549,20 @@ class RedactingFormatter(logging.Formatter):
     FORMAT_FIELDS = ('name', 'levelname', 'asctime', 'message')
     SEPARATOR = ";"
 
-    def __init__(self, fields: List[str]):
+    def __init__(self, fields: List[str], engine: str = 'regex'):
         super(RedactingFormatter, self).__init__(self.FORMAT)
         self.fields = fields
+        self.key = (tuple(fields), self.REDACTION, self.SEPARATOR)
+        self.redactor = get_redactor(*self.key, engine)
 
     def format(self, record: logging.LogRecord) -> str:
         """formats a LogRecord.
         """
         msg = super(RedactingFormatter, self).format(record)
-        txt = filter_datum(self.fields, self.REDACTION, msg, self.SEPARATOR)
+        if type(record) is _RedactedRecord and (
+                record.redaction_key == self.key):
+            return msg
+        txt = self.redactor.redact(msg)
         return txt
 
 
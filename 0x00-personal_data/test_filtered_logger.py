@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Property tests for the redaction engines of `filtered_logger`.
+"""
+import random
+import re
+import unittest
+
+from filtered_logger import (
+    PII_FIELDS,
+    Redactor,
+    TokenRedactor,
+    filter_datum,
+    get_redactor,
+)
+
+
+FIELD_SETS = (
+    PII_FIELDS,
+    ("na", "name", "username"),
+    ("ssn", "n", "sn"),
+    ("a",),
+    ("é",),
+)
+REDACTIONS = (
+    "***", "", "x=y", r"\\", r"\n", r"a\tb",
+    r"\g<field>", r"[\g<field>]", r"\1", r"<\1>\\",
+)
+SEPARATORS = (";", ",", " ", "\n")
+ALPHABET = "namésurpwd;=, x\\\n"
+SAMPLES = 500
+
+
+def random_message(rng: random.Random) -> str:
+    """Creates a random log line out of field-like characters.
+    """
+    size = rng.randint(0, 40)
+    return "".join(rng.choice(ALPHABET) for _ in range(size))
+
+
+class TestRedactionEngines(unittest.TestCase):
+    """Checks the token engine against the regex engine.
+    """
+
+    def test_token_engine_matches_regex_engine(self):
+        """The token engine's output is identical to the regex one.
+        """
+        rng = random.Random(0)
+        for fields in FIELD_SETS:
+            for redaction in REDACTIONS:
+                for separator in SEPARATORS:
+                    regex = Redactor(fields, redaction, separator)
+                    token = get_redactor(
+                        fields, redaction, separator, "token")
+                    self.assertIsInstance(token, TokenRedactor)
+                    for _ in range(SAMPLES):
+                        message = random_message(rng)
+                        self.assertEqual(
+                            token.redact(message),
+                            regex.redact(message),
+                            (fields, redaction, separator, message),
+                        )
+
+    def test_value_dependent_redactions_fall_back(self):
+        """Redactions that depend on the redacted value use the
+        regex engine.
+        """
+        for redaction in (r"\g<0>", r"[\g<0>]", r"\2"):
+            self.assertFalse(
+                TokenRedactor.supports(PII_FIELDS, redaction, ";"))
+        redactor = get_redactor(PII_FIELDS, r"<\g<0>>", ";", "token")
+        self.assertIsInstance(redactor, Redactor)
+        self.assertEqual(
+            redactor.redact("name=bob;ip=1;"),
+            "name=<name=bob>;ip=1;",
+        )
+
+    def test_unsupported_fields_fall_back(self):
+        """Fields and separators outside plain words use the
+        regex engine.
+        """
+        for fields, separator in (
+                (("a.b",), ";"), (("name",), "a"), ((), ";"),
+                (("name",), "=="), (("name",), "\\")):
+            self.assertFalse(TokenRedactor.supports(fields, "*", separator))
+
+    def test_filter_datum_matches_plain_substitution(self):
+        """filter_datum gives the output of a single re.sub.
+        """
+        rng = random.Random(1)
+        for redaction in REDACTIONS:
+            for _ in range(SAMPLES):
+                message = random_message(rng)
+                expected = re.sub(
+                    r"(?P<field>{})=[^;]*".format("|".join(PII_FIELDS)),
+                    r"\g<field>={}".format(redaction),
+                    message,
+                )
+                self.assertEqual(
+                    filter_datum(list(PII_FIELDS), redaction, message, ";"),
+                    expected,
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
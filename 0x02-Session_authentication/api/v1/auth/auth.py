@@ -3,27 +3,47 @@
 """
 import os
 import re
-from typing import List, TypeVar
+from functools import lru_cache
+from typing import Callable, List, Tuple, TypeVar
 from flask import request
 
 
+@lru_cache(maxsize=32)
+def exclusion_matcher(excluded_paths: Tuple[str, ...]) -> Callable:
+    """Compiles excluded paths into a single memoized matcher
+    that checks if a path is excluded.
+    """
+    patterns = []
+    for exclusion_path in map(lambda x: x.strip(), excluded_paths):
+        pattern = ''
+        if exclusion_path[-1] == '*':
+            pattern = '{}.*'.format(exclusion_path[0:-1])
+        elif exclusion_path[-1] == '/':
+            pattern = '{}/*'.format(exclusion_path[0:-1])
+        else:
+            pattern = '{}/*'.format(exclusion_path)
+        patterns.append('(?:{})'.format(pattern))
+    if len(patterns) == 0:
+        return lambda path: False
+    regex = re.compile('|'.join(patterns))
+    return lru_cache(maxsize=1024)(lambda path: regex.match(path) is not None)
+
+
 class Auth:
     """Authentication class.
     """
+    _exclusion = (None, None)
+
     def require_auth(self, path: str, excluded_paths: List[str]) -> bool:
         """Checks if a path requires authentication.
         """
         if path is not None and excluded_paths is not None:
-            for exclusion_path in map(lambda x: x.strip(), excluded_paths):
-                pattern = ''
-                if exclusion_path[-1] == '*':
-                    pattern = '{}.*'.format(exclusion_path[0:-1])
-                elif exclusion_path[-1] == '/':
-                    pattern = '{}/*'.format(exclusion_path[0:-1])
-                else:
-                    pattern = '{}/*'.format(exclusion_path)
-                if re.match(pattern, path):
-                    return False
+            cached_paths, is_excluded = self._exclusion
+            if excluded_paths is not cached_paths:
+                is_excluded = exclusion_matcher(tuple(excluded_paths))
+                if type(excluded_paths) is tuple:
+                    self._exclusion = (excluded_paths, is_excluded)
+            return not is_excluded(path)
         return True
 
     def authorization_header(self, request=None) -> str:
@@ -1,18 +1,100 @@
 #!/usr/bin/env python3
 """Basic authentication module for the API.
 """
+import os
 import re
+import hmac
+import time
 import base64
+import hashlib
 import binascii
+import threading
+from collections import OrderedDict
 from typing import Tuple, TypeVar
 
 from .auth import Auth
 from models.user import User
 
 
+class CredentialCache:
+    """Bounded LRU cache with expiration that maps a keyed digest of
+    an Authorization header to the user it was verified for.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        """Initializes a new CredentialCache instance.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._key = os.urandom(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def digest(self, authorization_header: str) -> bytes:
+        """Computes the keyed digest of an Authorization header.
+        """
+        return hmac.new(
+            self._key,
+            authorization_header.encode('utf-8'),
+            hashlib.sha256,
+        ).digest()
+
+    @staticmethod
+    def stamp(user: TypeVar('User')) -> Tuple[str, str]:
+        """Returns the credentials of a user that an entry depends on.
+        """
+        return (user.email, user.password)
+
+    def get(self, key: bytes) -> TypeVar('User'):
+        """Retrieves the user of an entry if it is still valid.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user_id, stamp, exp_time = entry
+            if exp_time < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        user = User.get(user_id)
+        if user is None or self.stamp(user) != stamp:
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+        return user
+
+    def set(self, key: bytes, user: TypeVar('User')):
+        """Stores the user verified for a digest.
+        """
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        exp_time = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (user.id, self.stamp(user), exp_time)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
 class BasicAuth(Auth):
     """Basic authentication class.
     """
+
+    def __init__(self) -> None:
+        """Initializes a new BasicAuth instance.
+        """
+        super().__init__()
+        try:
+            cache_size = int(os.getenv('BASIC_AUTH_CACHE_SIZE', '1024'))
+        except Exception:
+            cache_size = 1024
+        try:
+            cache_ttl = float(os.getenv('BASIC_AUTH_CACHE_TTL', '300'))
+        except Exception:
+            cache_ttl = 300.0
+        self.credential_cache = CredentialCache(cache_size, cache_ttl)
+
     def extract_base64_authorization_header(
             self,
             authorization_header: str) -> str:
@@ -82,7 +164,16 @@ class BasicAuth(Auth):
         """Retrieves the user from a request.
         """
         auth_header = self.authorization_header(request)
+        if type(auth_header) != str:
+            return None
+        cache_key = self.credential_cache.digest(auth_header)
+        user = self.credential_cache.get(cache_key)
+        if user is not None:
+            return user
         b64_auth_token = self.extract_base64_authorization_header(auth_header)
         auth_token = self.decode_base64_authorization_header(b64_auth_token)
         email, password = self.extract_user_credentials(auth_token)
-        return self.user_object_from_credentials(email, password)
+        user = self.user_object_from_credentials(email, password)
+        if user is not None:
+            self.credential_cache.set(cache_key, user)
+        return user
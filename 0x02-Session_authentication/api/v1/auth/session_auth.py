@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 """Session authentication module for the API.
 """
+import os
 from uuid import uuid4
+from typing import List
 from flask import request
 
 from .auth import Auth
@@ -12,6 +14,16 @@ class SessionAuth(Auth):
     """Session authentication class.
     """
     user_id_by_session_id = {}
+    session_ids_by_user_id = {}
+
+    def __init__(self) -> None:
+        """Initializes a new SessionAuth instance.
+        """
+        super().__init__()
+        try:
+            self.max_sessions = int(os.getenv('SESSION_MAX_PER_USER', '0'))
+        except Exception:
+            self.max_sessions = 0
 
     def create_session(self, user_id: str = None) -> str:
         """Creates a session id for the user.
@@ -19,8 +31,28 @@ class SessionAuth(Auth):
         if type(user_id) is str:
             session_id = str(uuid4())
             self.user_id_by_session_id[session_id] = user_id
+            session_ids = self.session_ids_by_user_id.setdefault(user_id, {})
+            session_ids[session_id] = None
+            self.limit_sessions(user_id, session_id)
             return session_id
 
+    def limit_sessions(self, user_id: str, session_id: str) -> int:
+        """Destroys the oldest sessions of a user beyond
+        SESSION_MAX_PER_USER, keeping the given new session, and
+        returns their number.
+        """
+        if self.max_sessions <= 0:
+            return 0
+        session_ids = self.user_session_ids(user_id)
+        if session_id not in session_ids:
+            session_ids.append(session_id)
+        extra_count = len(session_ids) - self.max_sessions
+        if extra_count <= 0:
+            return 0
+        for old_session_id in session_ids[:extra_count]:
+            self.revoke_session(old_session_id)
+        return extra_count
+
     def user_id_for_session_id(self, session_id: str = None) -> str:
         """Retrieves the user id of the user associated with
         a given session id.
@@ -28,12 +60,44 @@ class SessionAuth(Auth):
         if type(session_id) is str:
             return self.user_id_by_session_id.get(session_id)
 
+    def user_session_ids(self, user_id: str = None) -> List[str]:
+        """Retrieves the session ids of a user, oldest first.
+        """
+        return list(self.session_ids_by_user_id.get(user_id, {}))
+
     def current_user(self, request=None) -> User:
         """Retrieves the user associated with the request.
         """
         user_id = self.user_id_for_session_id(self.session_cookie(request))
         return User.get(user_id)
 
+    def _unlink_session(self, session_id: str) -> bool:
+        """Removes a session id from the in-memory session stores.
+        """
+        session = self.user_id_by_session_id.pop(session_id, None)
+        if session is None:
+            return False
+        user_id = session['user_id'] if type(session) is dict else session
+        session_ids = self.session_ids_by_user_id.get(user_id)
+        if session_ids is not None:
+            session_ids.pop(session_id, None)
+            if len(session_ids) == 0:
+                del self.session_ids_by_user_id[user_id]
+        return True
+
+    def revoke_session(self, session_id: str = None) -> bool:
+        """Destroys a session given its id.
+        """
+        return self._unlink_session(session_id)
+
+    def destroy_all_sessions(self, user_id: str = None) -> int:
+        """Destroys all the sessions of a user and returns their number.
+        """
+        session_ids = self.user_session_ids(user_id)
+        for session_id in session_ids:
+            self.revoke_session(session_id)
+        return len(session_ids)
+
     def destroy_session(self, request=None):
         """Destroys an authenticated session.
         """
@@ -41,6 +105,5 @@ class SessionAuth(Auth):
         user_id = self.user_id_for_session_id(session_id)
         if (request is None or session_id is None) or user_id is None:
             return False
-        if session_id in self.user_id_by_session_id:
-            del self.user_id_by_session_id[session_id]
+        self.revoke_session(session_id)
         return True
@@ -3,6 +3,7 @@
 and storage support module for the API.
 """
 from flask import request
+from typing import List
 from datetime import datetime, timedelta
 
 from models.user_session import UserSession
@@ -43,15 +44,29 @@ class SessionDBAuth(SessionExpAuth):
             return None
         return sessions[0].user_id
 
-    def destroy_session(self, request=None) -> bool:
-        """Destroys an authenticated session.
+    def user_session_ids(self, user_id: str = None) -> List[str]:
+        """Retrieves the stored session ids of a user, oldest first.
+        """
+        try:
+            sessions = UserSession.search({'user_id': user_id})
+        except Exception:
+            return []
+        sessions.sort(key=lambda x: x.created_at)
+        return [user_session.session_id for user_session in sessions]
+
+    def revoke_session(self, session_id: str = None) -> bool:
+        """Destroys a stored session given its id.
         """
-        session_id = self.session_cookie(request)
+        self._unlink_session(session_id)
         try:
             sessions = UserSession.search({'session_id': session_id})
         except Exception:
             return False
-        if len(sessions) <= 0:
-            return False
-        sessions[0].remove()
-        return True
+        for user_session in sessions:
+            user_session.remove()
+        return len(sessions) > 0
+
+    def destroy_session(self, request=None) -> bool:
+        """Destroys an authenticated session.
+        """
+        return self.revoke_session(self.session_cookie(request))
@@ -2,6 +2,8 @@
 """Session authentication with expiration module for the API.
 """
 import os
+import heapq
+import threading
 from flask import request
 from datetime import datetime, timedelta
 
@@ -11,6 +13,10 @@ from .session_auth import SessionAuth
 class SessionExpAuth(SessionAuth):
     """Session authentication class with expiration.
     """
+    expiry_heap = []
+    eviction_count = 0
+    EVICTION_BATCH = 8
+    _expiry_lock = threading.Lock()
 
     def __init__(self) -> None:
         """Initializes a new SessionExpAuth instance.
@@ -27,16 +33,23 @@ class SessionExpAuth(SessionAuth):
         session_id = super().create_session(user_id)
         if type(session_id) != str:
             return None
+        created_at = datetime.now()
         self.user_id_by_session_id[session_id] = {
             'user_id': user_id,
-            'created_at': datetime.now(),
+            'created_at': created_at,
         }
+        if self.session_duration > 0:
+            exp_time = created_at + timedelta(seconds=self.session_duration)
+            with self._expiry_lock:
+                heapq.heappush(self.expiry_heap, (exp_time, session_id))
+        self.evict_expired(self.EVICTION_BATCH)
         return session_id
 
     def user_id_for_session_id(self, session_id=None) -> str:
         """Retrieves the user id of the user associated with
         a given session id.
         """
+        self.evict_expired(self.EVICTION_BATCH)
         if session_id in self.user_id_by_session_id:
             session_dict = self.user_id_by_session_id[session_id]
             if self.session_duration <= 0:
@@ -49,3 +62,33 @@ class SessionExpAuth(SessionAuth):
             if exp_time < cur_time:
                 return None
             return session_dict['user_id']
+
+    def evict_expired(self, limit: int = None) -> int:
+        """Removes the expired sessions, looking at no more than
+        `limit` entries of the expiry heap, and returns their number.
+        """
+        evicted, popped = 0, 0
+        cur_time = datetime.now()
+        with self._expiry_lock:
+            while len(self.expiry_heap) > 0:
+                if limit is not None and popped >= limit:
+                    break
+                exp_time, session_id = self.expiry_heap[0]
+                if exp_time >= cur_time:
+                    break
+                heapq.heappop(self.expiry_heap)
+                popped += 1
+                if self._unlink_session(session_id):
+                    evicted += 1
+            SessionExpAuth.eviction_count += evicted
+        return evicted
+
+    def session_stats(self) -> dict:
+        """Retrieves the size and eviction metrics of the session store.
+        """
+        with self._expiry_lock:
+            return {
+                'sessions': len(self.user_id_by_session_id),
+                'pending_expirations': len(self.expiry_heap),
+                'evictions': SessionExpAuth.eviction_count,
+            }
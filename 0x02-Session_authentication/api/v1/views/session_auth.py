@@ -48,3 +48,18 @@ def logout() -> Tuple[str, int]:
     if not is_destroyed:
         abort(404)
     return jsonify({})
+
+
+@app_views.route(
+    '/auth_session/logout_all', methods=['DELETE'], strict_slashes=False)
+def logout_all() -> Tuple[str, int]:
+    """DELETE /api/v1/auth_session/logout_all
+    Return:
+      - An empty JSON object, once every session of the user is destroyed.
+    """
+    from api.v1.app import auth
+    user = auth.current_user(request)
+    if user is None:
+        abort(404)
+    auth.destroy_all_sessions(user.id)
+    return jsonify({})
@@ -1,19 +1,99 @@
 #!/usr/bin/env python3
 """Module of Users views.
 """
+import json
+import zlib
+from typing import Iterator, List
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from flask import abort, jsonify, request, Response
 from models.user import User
 
 
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def project_user(user: User, fields: List[str] = None) -> dict:
+    """Returns the JSON representation of a User object,
+    restricted to the given fields.
+    """
+    user_json = user.to_json()
+    if fields is None:
+        return user_json
+    return {k: user_json[k] for k in fields if k in user_json}
+
+
+def export_users(fields: List[str] = None) -> Iterator[str]:
+    """Yields one NDJSON line per User object, a page at a time.
+    """
+    cursor = None
+    while True:
+        users, cursor = User.page(cursor, PAGE_SIZE)
+        yield ''.join(
+            json.dumps(project_user(user, fields)) + '\n' for user in users)
+        if cursor is None:
+            return
+
+
+def gzip_chunks(chunks: Iterator[str]) -> Iterator[bytes]:
+    """Compresses text chunks into a gzip stream, flushing after
+    each chunk so the client receives data as it is produced.
+    """
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        data += compressor.flush(zlib.Z_SYNC_FLUSH)
+        if len(data) > 0:
+            yield data
+    yield compressor.flush()
+
+
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
 def view_all_users() -> str:
     """GET /api/v1/users
+    Query parameters:
+      - limit (optional): number of User objects per page.
+      - cursor (optional): the next_cursor of the previous page.
+      - fields (optional): comma-separated list of fields to return.
     Return:
       - list of all User objects JSON represented.
+      - with `Accept: application/x-ndjson`, a stream of all User
+        objects JSON represented, one per line (gzip-encoded if
+        accepted by the client).
+      - with limit or cursor, the page of User objects JSON
+        represented and the cursor of the next page.
+      - 400 if limit or cursor is invalid.
     """
-    all_users = [user.to_json() for user in User.all()]
-    return jsonify(all_users)
+    fields = request.args.get('fields')
+    fields = None if fields is None else fields.split(',')
+    mimetype = request.accept_mimetypes.best_match(
+        ['application/json', NDJSON_MIMETYPE])
+    if mimetype == NDJSON_MIMETYPE:
+        chunks = export_users(fields)
+        headers = {'Vary': 'Accept, Accept-Encoding'}
+        if 'gzip' in request.accept_encodings:
+            chunks = gzip_chunks(chunks)
+            headers['Content-Encoding'] = 'gzip'
+        return Response(chunks, mimetype=NDJSON_MIMETYPE, headers=headers)
+    limit, cursor = request.args.get('limit'), request.args.get('cursor')
+    if limit is None and cursor is None:
+        all_users = [project_user(user, fields) for user in User.all()]
+        return jsonify(all_users)
+    try:
+        limit = int(limit) if limit is not None else PAGE_SIZE
+    except ValueError:
+        limit = 0
+    if limit <= 0 or limit > MAX_PAGE_SIZE:
+        return jsonify({'error': "Invalid limit"}), 400
+    try:
+        users, next_cursor = User.page(cursor, limit)
+    except ValueError:
+        return jsonify({'error': "Invalid cursor"}), 400
+    return jsonify({
+        'users': [project_user(user, fields) for user in users],
+        'next_cursor': next_cursor,
+    })
 
 
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
@@ -125,3 +205,90 @@ def update_user(user_id: str = None) -> str:
         user.last_name = rj.get('last_name')
     user.save()
     return jsonify(user.to_json()), 200
+
+
+def apply_user_operation(op: dict, saved: dict, removed: dict) -> dict:
+    """Applies a create, update or delete operation of a batch in memory,
+    recording the User objects to save or remove, and returns its result.
+    """
+    if type(op) is not dict:
+        return {'status': 400, 'error': "Wrong format"}
+    if op.get('op') == 'create':
+        if op.get("email", "") == "":
+            return {'status': 400, 'error': "email missing"}
+        if op.get("password", "") == "":
+            return {'status': 400, 'error': "password missing"}
+        try:
+            user = User()
+            user.email = op.get("email")
+            user.password = op.get("password")
+            user.first_name = op.get("first_name")
+            user.last_name = op.get("last_name")
+        except Exception as e:
+            return {'status': 400, 'error': "Can't create User: {}".format(e)}
+        saved[user.id] = user
+        return {'status': 201, 'user': user}
+    if op.get('op') not in ('update', 'delete'):
+        return {'status': 400, 'error': "op must be create, update or delete"}
+    user_id = op.get('id')
+    if type(user_id) is not str:
+        return {'status': 404, 'error': "Not found"}
+    user = saved.get(user_id)
+    if user is None and user_id not in removed:
+        user = User.get(user_id)
+    if user is None:
+        return {'status': 404, 'error': "Not found"}
+    if op.get('op') == 'delete':
+        saved.pop(user_id, None)
+        removed[user_id] = user
+        return {'status': 200}
+    if op.get('first_name') is not None:
+        user.first_name = op.get('first_name')
+    if op.get('last_name') is not None:
+        user.last_name = op.get('last_name')
+    saved[user_id] = user
+    return {'status': 200, 'user': user}
+
+
+@app_views.route('/users/batch', methods=['POST'], strict_slashes=False)
+def batch_users() -> str:
+    """POST /api/v1/users/batch
+    JSON body:
+      - list of operations, or one operation per line with
+        `Content-Type: application/x-ndjson`:
+        - op: create, update or delete.
+        - id: User ID (update and delete).
+        - email, password (create).
+        - last_name, first_name (optional, create and update).
+    Return:
+      - list of results, in the order of the operations, once all of
+        them are persisted at once:
+        - status: 201, 200, 400 or 404 like the single-User routes.
+        - user: User object JSON represented (create and update).
+        - error: message (400 and 404).
+      - 400 if the body has a wrong format.
+    """
+    ops = None
+    if request.mimetype == NDJSON_MIMETYPE:
+        ops = []
+        for line in request.stream:
+            if len(line.strip()) == 0:
+                continue
+            try:
+                ops.append(json.loads(line))
+            except ValueError:
+                ops.append(None)
+    else:
+        try:
+            ops = request.get_json()
+        except Exception as e:
+            ops = None
+    if type(ops) is not list:
+        return jsonify({'error': "Wrong format"}), 400
+    saved, removed = {}, {}
+    results = [apply_user_operation(op, saved, removed) for op in ops]
+    User.commit_many(saved.values(), removed.values())
+    for result in results:
+        if 'user' in result:
+            result['user'] = result['user'].to_json()
+    return jsonify(results), 200
@@ -1,20 +1,127 @@
 #!/usr/bin/env python3
 """Base module.
 """
-import json
+import atexit
 import uuid
-from os import path
+import base64
+from bisect import bisect_left, bisect_right
+from os import getenv
 from datetime import datetime
-from typing import TypeVar, List, Iterable
+from types import MemberDescriptorType
+from typing import TypeVar, List, Iterable, Iterator, Tuple
+
+from models.engine.db_storage import DBStorage
+from models.engine.file_storage import FileStorage
+from models.engine.journal_storage import JournalStorage
+from models.engine.write_behind_storage import WriteBehindStorage
+from models.lazy_objects import LazyObjects
 
 
 TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
 DATA = {}
+INDEXES = {}
+ORDERS = {}
+SLOTS = {}
+storage = FileStorage()
+storage_type = getenv('STORAGE_TYPE', 'file')
+if storage_type == 'journal':
+    storage = JournalStorage()
+if storage_type == 'sqlite':
+    storage = DBStorage()
+if getenv('STORAGE_WRITE_BEHIND', 'false') == 'true' and storage.in_memory:
+    storage = WriteBehindStorage(storage)
+atexit.register(storage.close)
+lazy_load = getenv('STORAGE_LAZY_LOAD', 'false') == 'true'
+
+
+class TrackedAttribute():
+    """Descriptor of an attribute that the indexes or the creation
+    order of stored objects depend on. Other attributes are set
+    without going through Python code.
+    """
+
+    def __init__(self, name: str, slot: object = None,
+                 indexed: bool = False, ordered: bool = False):
+        """Initialize a TrackedAttribute instance around the slot
+        descriptor that holds the value, if any.
+        """
+        self.name = name
+        self.slot = slot if type(slot) is MemberDescriptorType else None
+        self.indexed = indexed
+        self.ordered = ordered
+
+    def __get__(self, obj: object, objtype: type = None) -> object:
+        """Get the attribute.
+        """
+        if obj is None:
+            return self
+        if self.slot is not None:
+            return self.slot.__get__(obj, objtype)
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+    def __set__(self, obj: object, value: object):
+        """Set the attribute and update the indexes of a stored object.
+        """
+        stored = obj.is_stored()
+        if stored:
+            self._untrack(obj)
+        if self.slot is not None:
+            self.slot.__set__(obj, value)
+        else:
+            obj.__dict__[self.name] = value
+        if stored:
+            self._track(obj)
+
+    def __delete__(self, obj: object):
+        """Delete the attribute.
+        """
+        if obj.is_stored():
+            self._untrack(obj)
+        if self.slot is not None:
+            self.slot.__delete__(obj)
+        else:
+            obj.__dict__.pop(self.name, None)
+
+    def _track(self, obj: object):
+        """Add a stored object to the indexes of the attribute.
+        """
+        if self.indexed:
+            obj._index((self.name,))
+        if self.ordered:
+            obj._order()
+
+    def _untrack(self, obj: object):
+        """Remove a stored object from the indexes of the attribute.
+        """
+        if self.indexed:
+            obj._unindex((self.name,))
+        if self.ordered:
+            obj._unorder()
 
 
 class Base():
     """Base class.
+    Subclasses that declare __slots__ get a compact representation
+    without a per-instance __dict__.
     """
+    __slots__ = ('id', 'created_at', 'updated_at')
+    INDEXED_ATTRIBUTES = ()
+
+    def __init_subclass__(cls, **kwargs):
+        """Track the indexed attributes of a subclass.
+        """
+        super().__init_subclass__(**kwargs)
+        for name in cls.INDEXED_ATTRIBUTES:
+            attribute = getattr(cls, name, None)
+            if isinstance(attribute, TrackedAttribute):
+                if attribute.indexed:
+                    continue
+                attribute = attribute.slot
+            setattr(cls, name, TrackedAttribute(
+                name, attribute, indexed=True, ordered=name == 'created_at'))
 
     def __init__(self, *args: list, **kwargs: dict):
         """Initialize a Base instance.
@@ -23,7 +130,7 @@ class Base():
         if DATA.get(s_class) is None:
             DATA[s_class] = {}
 
-        self.id = kwargs.get('id', str(uuid.uuid4()))
+        self.id = kwargs['id'] if 'id' in kwargs else str(uuid.uuid4())
         if kwargs.get('created_at') is not None:
             self.created_at = datetime.strptime(kwargs.get('created_at'),
                                                 TIMESTAMP_FORMAT)
@@ -44,11 +151,130 @@ class Base():
             return False
         return (self.id == other.id)
 
+    def is_stored(self) -> bool:
+        """Check if this object is the one stored under its ID.
+        """
+        s_class = self.__class__.__name__
+        objs = DATA.get(s_class, {})
+        if isinstance(objs, LazyObjects):
+            return objs.peek(getattr(self, 'id', None)) is self
+        return objs.get(getattr(self, 'id', None)) is self
+
+    @classmethod
+    def indexes(cls) -> dict:
+        """Return the secondary indexes of the class, which map
+        each indexed attribute to {value: {id: None}}.
+        """
+        s_class = cls.__name__
+        if INDEXES.get(s_class) is None:
+            INDEXES[s_class] = {k: {} for k in cls.INDEXED_ATTRIBUTES}
+        return INDEXES[s_class]
+
+    @classmethod
+    def _index_values(cls, obj_id: str, values: dict):
+        """Add an object ID to the indexes of the given
+        {attribute: value} pairs.
+        """
+        indexes = cls.indexes()
+        for k, value in values.items():
+            try:
+                indexes[k].setdefault(value, {})[obj_id] = None
+            except TypeError:
+                continue
+
+    def _index(self, attributes: Iterable[str] = None):
+        """Add the object to the indexes of the given attributes.
+        """
+        attributes = attributes or self.INDEXED_ATTRIBUTES
+        values = {k: getattr(self, k, None) for k in attributes}
+        self.__class__._index_values(self.id, values)
+
+    def _unindex(self, attributes: Iterable[str] = None):
+        """Remove the object from the indexes of the given attributes.
+        """
+        indexes = self.__class__.indexes()
+        for k in attributes or self.INDEXED_ATTRIBUTES:
+            value = getattr(self, k, None)
+            try:
+                ids = indexes[k].get(value)
+            except TypeError:
+                continue
+            if ids is not None:
+                ids.pop(self.id, None)
+                if len(ids) == 0:
+                    del indexes[k][value]
+
+    @classmethod
+    def slot_names(cls) -> Tuple[str, ...]:
+        """Return the names of the slots of the class, base classes first.
+        """
+        if SLOTS.get(cls) is None:
+            names = []
+            for klass in reversed(cls.__mro__):
+                slots = klass.__dict__.get('__slots__', ())
+                if type(slots) is str:
+                    slots = (slots,)
+                names.extend(k for k in slots if k not in names)
+            SLOTS[cls] = tuple(k for k in names if k != '__dict__')
+        return SLOTS[cls]
+
+    def attributes(self) -> Iterator[Tuple[str, object]]:
+        """Iterate over the (name, value) pairs of the attributes
+        set on the object, whether in slots or in __dict__.
+        """
+        for key in self.__class__.slot_names():
+            try:
+                yield key, getattr(self, key)
+            except AttributeError:
+                continue
+        if hasattr(self, '__dict__'):
+            yield from self.__dict__.items()
+
+    def order_key(self) -> Tuple[str, str]:
+        """Return the (created_at, id) key that orders the objects.
+        """
+        return (self.created_at.strftime(TIMESTAMP_FORMAT), self.id)
+
+    @classmethod
+    def ordered_keys(cls) -> List[Tuple[str, str]]:
+        """Return the sorted (created_at, id) keys of all objects,
+        building the ordered index the first time.
+        """
+        s_class = cls.__name__
+        if ORDERS.get(s_class) is None:
+            objs = DATA[s_class]
+            if isinstance(objs, LazyObjects):
+                keys = [(obj_json.get('created_at'), obj_id)
+                        for obj_id, obj_json in objs.json_items()]
+            else:
+                keys = [obj.order_key() for obj in list(objs.values())]
+            keys.sort()
+            ORDERS[s_class] = keys
+        return ORDERS[s_class]
+
+    def _order(self):
+        """Add the object to the ordered index if it is built.
+        """
+        keys = ORDERS.get(self.__class__.__name__)
+        if keys is not None:
+            key = self.order_key()
+            keys.insert(bisect_left(keys, key), key)
+
+    def _unorder(self):
+        """Remove the object from the ordered index if it is built.
+        """
+        keys = ORDERS.get(self.__class__.__name__)
+        if keys is not None:
+            key = self.order_key()
+            i = bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                del keys[i]
+
     def to_json(self, for_serialization: bool = False) -> dict:
         """Convert the object a JSON dictionary.
         """
         result = {}
-        for key, value in self.__dict__.items():
+        for key, value in self.attributes():
             if not for_serialization and key[0] == '_':
                 continue
             if type(value) is datetime:
@@ -60,52 +286,107 @@ class Base():
     @classmethod
     def load_from_file(cls):
         """Load all objects from file.
+        In lazy mode, objects are only built when first accessed.
+        Engines that are not in memory are queried directly instead.
         """
         s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        DATA[s_class] = {}
-        if not path.exists(file_path):
+        INDEXES[s_class] = None
+        ORDERS[s_class] = None
+        if not storage.in_memory:
+            DATA[s_class] = {}
             return
-
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
-            for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+        if lazy_load:
+            DATA[s_class] = LazyObjects(cls)
+            for obj_id, obj_json in storage.load(cls, streaming=True):
+                DATA[s_class].load(obj_id, obj_json)
+                values = {k: obj_json.get(k) for k in cls.INDEXED_ATTRIBUTES}
+                cls._index_values(obj_id, values)
+            return
+        DATA[s_class] = {}
+        for obj_id, obj_json in storage.load(cls):
+            obj = cls(**obj_json)
+            DATA[s_class][obj_id] = obj
+            obj._index()
 
     @classmethod
     def save_to_file(cls):
         """Save all objects to file.
         """
         s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        objs_json = {}
-        for obj_id, obj in DATA[s_class].items():
-            objs_json[obj_id] = obj.to_json(True)
+        storage.save(cls, DATA[s_class])
 
-        with open(file_path, 'w') as f:
-            json.dump(objs_json, f)
+    def _store(self):
+        """Store the current object in memory, without persisting it.
+        """
+        s_class = self.__class__.__name__
+        self.updated_at = datetime.utcnow()
+        old_obj = DATA[s_class].get(self.id)
+        if storage.in_memory and old_obj is not self:
+            if old_obj is not None:
+                old_obj._unindex()
+                old_obj._unorder()
+            DATA[s_class][self.id] = self
+            self._index()
+            self._order()
+
+    def _unstore(self) -> bool:
+        """Remove the current object from memory, without persisting it,
+        and return whether it has to be removed from the storage.
+        """
+        s_class = self.__class__.__name__
+        if not storage.in_memory:
+            return True
+        obj = DATA[s_class].get(self.id)
+        if obj is None:
+            return False
+        del DATA[s_class][self.id]
+        obj._unindex()
+        obj._unorder()
+        return True
 
     def save(self):
         """Save current object.
         """
         s_class = self.__class__.__name__
-        self.updated_at = datetime.utcnow()
-        DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        self._store()
+        storage.commit(self.__class__, DATA[s_class], {self.id: self})
 
     def remove(self):
         """Remove object.
         """
         s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
-            del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+        if self._unstore():
+            storage.commit(self.__class__, DATA[s_class], {self.id: None})
+
+    @classmethod
+    def commit_many(cls, saved: Iterable[TypeVar('Base')] = (),
+                    removed: Iterable[TypeVar('Base')] = ()):
+        """Save and remove several objects with a single commit.
+        """
+        s_class = cls.__name__
+        changes = {}
+        for obj in saved:
+            obj._store()
+            changes[obj.id] = obj
+        for obj in removed:
+            if obj._unstore():
+                changes[obj.id] = None
+        if len(changes) > 0:
+            storage.commit(cls, DATA[s_class], changes)
+
+    @classmethod
+    def flush(cls):
+        """Persist the pending changes of all objects.
+        """
+        storage.flush()
 
     @classmethod
     def count(cls) -> int:
         """Count all objects.
         """
         s_class = cls.__name__
+        if not storage.in_memory:
+            return storage.count(cls)
         return len(DATA[s_class].keys())
 
     @classmethod
@@ -119,13 +400,19 @@ class Base():
         """Return one object by ID.
         """
         s_class = cls.__name__
+        if not storage.in_memory:
+            return storage.get(cls, id)
         return DATA[s_class].get(id)
 
     @classmethod
     def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
         """Search all objects with matching attributes.
+        Indexed attributes narrow the candidates before the scan.
         """
         s_class = cls.__name__
+        if not storage.in_memory:
+            return storage.search(cls, attributes)
+        objs = DATA[s_class]
         def _search(obj):
             if len(attributes) == 0:
                 return True
@@ -134,4 +421,56 @@ class Base():
                     return False
             return True
 
-        return list(filter(_search, DATA[s_class].values()))
+        candidates = None
+        indexes = cls.indexes()
+        for k, v in attributes.items():
+            if k not in indexes:
+                continue
+            try:
+                ids = indexes[k].get(v, {})
+            except TypeError:
+                continue
+            if candidates is None or len(ids) < len(candidates):
+                candidates = ids
+        if candidates is not None:
+            return list(filter(_search, [objs[i] for i in candidates]))
+        return list(filter(_search, objs.values()))
+
+    @classmethod
+    def page(cls, cursor: str = None,
+             limit: int = 100) -> Tuple[List[TypeVar('Base')], str]:
+        """Return up to `limit` objects ordered by creation time,
+        starting after a cursor, and the cursor of the next page
+        (None on the last page).
+        """
+        s_class = cls.__name__
+        after = None if cursor is None else decode_cursor(cursor)
+        if not storage.in_memory:
+            objs = storage.page(cls, after, limit + 1)
+        else:
+            keys = cls.ordered_keys()
+            start = 0 if after is None else bisect_right(keys, after)
+            objs = [DATA[s_class][k[1]] for k in keys[start:start + limit + 1]]
+        if len(objs) <= limit:
+            return objs, None
+        objs = objs[:limit]
+        return objs, encode_cursor(objs[-1].order_key())
+
+
+Base.created_at = TrackedAttribute(
+    'created_at', Base.__dict__['created_at'], ordered=True)
+
+
+def encode_cursor(key: Tuple[str, str]) -> str:
+    """Encode a (created_at, id) key into an opaque pagination cursor.
+    """
+    return base64.urlsafe_b64encode('|'.join(key).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a pagination cursor into a (created_at, id) key.
+    """
+    key = base64.urlsafe_b64decode(cursor.encode()).decode().split('|', 1)
+    if len(key) != 2:
+        raise ValueError("Invalid cursor: {}".format(cursor))
+    return tuple(key)
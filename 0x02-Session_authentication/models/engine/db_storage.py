@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""SQLite storage engine module.
+"""
+import os
+import json
+import sqlite3
+import threading
+from typing import Iterator, List, Tuple, TypeVar
+
+
+class DBStorage:
+    """Storage engine that keeps each class in a table of a SQLite
+    database, so several processes can serve the same objects.
+
+    Each table stores the JSON dictionary of an object, next to
+    indexed columns for its ID and its indexed attributes.
+    """
+    in_memory = False
+    SQL_TYPES = (str, int, float, type(None))
+
+    def __init__(self) -> None:
+        """Initializes a new DBStorage instance.
+        """
+        self.db_path = os.getenv('STORAGE_DB_PATH', '.db.sqlite3')
+        self._local = threading.local()
+        self._statements = {}
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the connection of the current thread.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.db_path, timeout=30, cached_statements=256)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _columns(cls: type) -> Tuple[str, ...]:
+        """Return the indexed columns of the table of a class.
+        """
+        return ('created_at',) + tuple(
+            k for k in cls.INDEXED_ATTRIBUTES if k not in ('id', 'created_at'))
+
+    def _sql(self, cls: type) -> dict:
+        """Return the statements of a class, creating its table
+        and indexes the first time.
+        """
+        s_class = cls.__name__
+        statements = self._statements.get(s_class)
+        if statements is not None:
+            return statements
+        columns = self._columns(cls)
+        with self._lock:
+            connection = self._connection()
+            with connection:
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS "{}" ('
+                    'id TEXT PRIMARY KEY, data TEXT NOT NULL{})'.format(
+                        s_class,
+                        ''.join(', "{}"'.format(k) for k in columns)))
+                cursor = connection.execute(
+                    'PRAGMA table_info("{}")'.format(s_class))
+                table_columns = [row[1] for row in cursor]
+                for k in columns:
+                    if k in table_columns:
+                        continue
+                    connection.execute(
+                        'ALTER TABLE "{}" ADD COLUMN "{}"'.format(s_class, k))
+                    connection.execute(
+                        'UPDATE "{0}" SET "{1}" = '
+                        "json_extract(data, '$.{1}')".format(s_class, k))
+                connection.execute(
+                    'CREATE INDEX IF NOT EXISTS "{0}_created_at" '
+                    'ON "{0}"(created_at, id)'.format(s_class))
+                for k in columns[1:]:
+                    connection.execute(
+                        'CREATE INDEX IF NOT EXISTS "{0}_{1}" '
+                        'ON "{0}"("{1}")'.format(s_class, k))
+            names = ('id', 'data') + columns
+            statements = {
+                'select': 'SELECT data FROM "{}"'.format(s_class),
+                'count': 'SELECT COUNT(*) FROM "{}"'.format(s_class),
+                'first_page': 'SELECT data FROM "{}" '
+                              'ORDER BY created_at, id LIMIT ?'.format(
+                                  s_class),
+                'page': 'SELECT data FROM "{}" '
+                        'WHERE (created_at, id) > (?, ?) '
+                        'ORDER BY created_at, id LIMIT ?'.format(s_class),
+                'upsert': 'INSERT INTO "{}" ({}) VALUES ({}) '
+                          'ON CONFLICT(id) DO UPDATE SET {}'.format(
+                              s_class,
+                              ', '.join('"{}"'.format(k) for k in names),
+                              ', '.join('?' for k in names),
+                              ', '.join('"{0}" = excluded."{0}"'.format(k)
+                                        for k in names[1:])),
+                'delete': 'DELETE FROM "{}" WHERE id = ?'.format(s_class),
+            }
+            self._statements[s_class] = statements
+        return statements
+
+    def _row(self, obj: TypeVar('Base')) -> tuple:
+        """Return the column values of an object.
+        """
+        obj_json = obj.to_json(True)
+        values = [obj.id, json.dumps(obj_json)]
+        for k in self._columns(obj.__class__):
+            value = obj_json.get(k)
+            values.append(value if type(value) in self.SQL_TYPES else None)
+        return tuple(values)
+
+    def load(self, cls: type,
+             streaming: bool = False) -> Iterator[Tuple[str, dict]]:
+        """Iterate over the stored (id, JSON dictionary) pairs of a class.
+        """
+        cursor = self._connection().execute(self._sql(cls)['select'])
+        for (data,) in cursor:
+            obj_json = json.loads(data)
+            yield obj_json['id'], obj_json
+
+    def save(self, cls: type, objs: dict):
+        """Save all the given objects of a class.
+        """
+        self.commit(cls, objs, dict(objs.items()))
+
+    def commit(self, cls: type, objs: dict, changes: dict):
+        """Persist the changes ({id: object or None}) made to the
+        objects of a class in a single transaction.
+        """
+        statements = self._sql(cls)
+        upserts, deletes = [], []
+        for obj_id, obj in changes.items():
+            if obj is None:
+                deletes.append((obj_id,))
+            else:
+                upserts.append(self._row(obj))
+        connection = self._connection()
+        with connection:
+            if len(upserts) > 0:
+                connection.executemany(statements['upsert'], upserts)
+            if len(deletes) > 0:
+                connection.executemany(statements['delete'], deletes)
+
+    def count(self, cls: type) -> int:
+        """Count the stored objects of a class.
+        """
+        cursor = self._connection().execute(self._sql(cls)['count'])
+        return cursor.fetchone()[0]
+
+    def get(self, cls: type, id: str) -> TypeVar('Base'):
+        """Return one stored object of a class by ID.
+        """
+        objs = self.search(cls, {'id': id})
+        return objs[0] if len(objs) > 0 else None
+
+    def search(self, cls: type,
+               attributes: dict = {}) -> List[TypeVar('Base')]:
+        """Search the stored objects of a class with matching attributes.
+        Indexed attributes are matched in SQL, the others in Python.
+        """
+        columns = ('id',) + self._columns(cls)
+        conditions, params, others = [], [], {}
+        for k, v in attributes.items():
+            if k not in columns or type(v) not in self.SQL_TYPES:
+                others[k] = v
+            elif v is None:
+                conditions.append('"{}" IS NULL'.format(k))
+            else:
+                conditions.append('"{}" = ?'.format(k))
+                params.append(v)
+        sql = self._sql(cls)['select']
+        if len(conditions) > 0:
+            sql = '{} WHERE {}'.format(sql, ' AND '.join(conditions))
+        result = []
+        for (data,) in self._connection().execute(sql, params):
+            obj = cls(**json.loads(data))
+            if all(getattr(obj, k) == v for k, v in others.items()):
+                result.append(obj)
+        return result
+
+    def page(self, cls: type, after: Tuple[str, str],
+             limit: int) -> List[TypeVar('Base')]:
+        """Return up to `limit` stored objects of a class ordered by
+        (created_at, id), starting after a key (None for the start).
+        """
+        statements = self._sql(cls)
+        if after is None:
+            cursor = self._connection().execute(
+                statements['first_page'], (limit,))
+        else:
+            cursor = self._connection().execute(
+                statements['page'], tuple(after) + (limit,))
+        return [cls(**json.loads(data)) for (data,) in cursor]
+
+    def flush(self):
+        """Persist the pending changes.
+        """
+
+    def close(self):
+        """Close the connection of the current thread.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
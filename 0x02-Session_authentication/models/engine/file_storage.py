@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""File storage engine module.
+"""
+import json
+from os import path
+from typing import IO, Iterator, Tuple
+
+from models.lazy_objects import LazyObjects
+
+
+class FileStorage:
+    """Storage engine that keeps all the objects of a class
+    in a single JSON file, rewritten on every change.
+    """
+    in_memory = True
+    FILE_FORMAT = ".db_{}.json"
+    CHUNK_SIZE = 64 * 1024
+    WHITESPACE = ' \t\n\r'
+    DELIMITERS = tuple(WHITESPACE + ',:}')
+
+    def file_path(self, s_class: str) -> str:
+        """Return the path of the JSON file of a class.
+        """
+        return self.FILE_FORMAT.format(s_class)
+
+    def load(self, cls: type,
+             streaming: bool = False) -> Iterator[Tuple[str, dict]]:
+        """Iterate over the stored (id, JSON dictionary) pairs of a class.
+        When streaming, the file is parsed in chunks instead of all at
+        once, which is slower but keeps memory low.
+        """
+        file_path = self.file_path(cls.__name__)
+        if not path.exists(file_path):
+            return
+        with open(file_path, 'r') as f:
+            if streaming:
+                yield from self._iter_items(f)
+            else:
+                yield from json.load(f).items()
+
+    def _iter_items(self, f: IO[str]) -> Iterator[Tuple[str, object]]:
+        """Iterate over the (key, value) pairs of the JSON object in a
+        file, reading it in chunks instead of all at once.
+        """
+        decoder = json.JSONDecoder()
+        buf, pos, eof = '', 0, False
+
+        def fill():
+            nonlocal buf, pos, eof
+            chunk = f.read(self.CHUNK_SIZE)
+            buf, pos = buf[pos:] + chunk, 0
+            eof = len(chunk) == 0
+
+        def skip() -> str:
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in self.WHITESPACE:
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return buf[pos:pos + 1]
+                fill()
+
+        def expect(chars: str) -> str:
+            nonlocal pos
+            char = skip()
+            if char == '' or char not in chars:
+                raise ValueError("Expecting one of '{}' at {}: {}".format(
+                    chars, f.name, repr(char)))
+            pos += 1
+            return char
+
+        def decode() -> object:
+            nonlocal pos
+            skip()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                    if eof or buf[end:end + 1] in self.DELIMITERS:
+                        pos = end
+                        return value
+                except ValueError:
+                    if eof:
+                        raise
+                fill()
+
+        expect('{')
+        if skip() == '}':
+            return
+        while True:
+            key = decode()
+            expect(':')
+            yield key, decode()
+            if expect(',}') == '}':
+                return
+
+    def save(self, cls: type, objs: dict):
+        """Save all the objects of a class.
+        """
+        objs_json = {}
+        if isinstance(objs, LazyObjects):
+            objs_json.update(objs.json_items())
+        else:
+            for obj_id, obj in list(objs.items()):
+                objs_json[obj_id] = obj.to_json(True)
+
+        with open(self.file_path(cls.__name__), 'w') as f:
+            json.dump(objs_json, f)
+
+    def commit(self, cls: type, objs: dict, changes: dict):
+        """Persist the changes ({id: object or None}) made to the
+        objects of a class.
+        """
+        self.save(cls, objs)
+
+    def flush(self):
+        """Persist the pending changes.
+        """
+
+    def close(self):
+        """Persist the pending changes and release the resources.
+        """
+        self.flush()
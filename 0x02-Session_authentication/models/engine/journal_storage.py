@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Journal storage engine module.
+"""
+import os
+import json
+import time
+import threading
+from os import path
+from typing import Iterator, Tuple
+
+from models.engine.file_storage import FileStorage
+
+
+class JournalStorage(FileStorage):
+    """Storage engine that appends one JSON line per change to a
+    journal and compacts it into the JSON file of the class in the
+    background once it grows past a size threshold.
+    """
+    JOURNAL_FORMAT = ".db_{}.journal"
+    SYNC_MODES = ('always', 'batch', 'never')
+
+    def __init__(self) -> None:
+        """Initializes a new JournalStorage instance.
+        """
+        self.sync_mode = os.getenv('STORAGE_SYNC', 'batch')
+        if self.sync_mode not in self.SYNC_MODES:
+            self.sync_mode = 'batch'
+        try:
+            self.sync_interval = float(
+                os.getenv('STORAGE_SYNC_INTERVAL', '1'))
+        except Exception:
+            self.sync_interval = 1.0
+        try:
+            self.compact_size = int(
+                os.getenv('STORAGE_COMPACT_SIZE', str(4 * 1024 * 1024)))
+        except Exception:
+            self.compact_size = 4 * 1024 * 1024
+        self._journals = {}
+        self._last_sync = {}
+        self._compacting = set()
+        self._write_lock = threading.Lock()
+        self._compact_locks = {}
+
+    def journal_path(self, s_class: str) -> str:
+        """Return the path of the journal of a class.
+        """
+        return self.JOURNAL_FORMAT.format(s_class)
+
+    def _compact_lock(self, s_class: str) -> threading.Lock:
+        """Return the lock serializing the compactions of a class.
+        """
+        with self._write_lock:
+            return self._compact_locks.setdefault(s_class, threading.Lock())
+
+    def _journal(self, s_class: str):
+        """Return the open journal file of a class.
+        """
+        if self._journals.get(s_class) is None:
+            journal_path = self.journal_path(s_class)
+            self._truncate_torn_line(journal_path)
+            self._journals[s_class] = open(journal_path, 'a')
+            self._last_sync[s_class] = time.monotonic()
+        return self._journals[s_class]
+
+    def _close_journal(self, s_class: str):
+        """Sync and close the journal file of a class.
+        """
+        journal = self._journals.pop(s_class, None)
+        if journal is not None:
+            journal.flush()
+            os.fsync(journal.fileno())
+            journal.close()
+
+    @staticmethod
+    def _truncate_torn_line(file_path: str):
+        """Cut a journal file back to the end of its last complete
+        line, dropping what an interrupted write left behind.
+        """
+        if not path.exists(file_path):
+            return
+        with open(file_path, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            pos = end
+            while pos > 0:
+                size = min(pos, 64 * 1024)
+                f.seek(pos - size)
+                i = f.read(size).rfind(b'\n')
+                if i != -1:
+                    pos = pos - size + i + 1
+                    break
+                pos -= size
+            if pos != end:
+                f.truncate(pos)
+
+    @staticmethod
+    def _replay(file_path: str, objs_json: dict):
+        """Apply the records of a journal file to the JSON
+        dictionaries of a class, skipping torn lines.
+        """
+        if not path.exists(file_path):
+            return
+        with open(file_path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if type(record) is not dict or 'id' not in record:
+                    continue
+                if record.get('obj') is None:
+                    objs_json.pop(record['id'], None)
+                else:
+                    objs_json[record['id']] = record['obj']
+
+    def _read(self, cls: type) -> dict:
+        """Read the JSON file of a class and replay its journals.
+        """
+        objs_json = dict(super().load(cls))
+        journal_path = self.journal_path(cls.__name__)
+        self._replay('{}.old'.format(journal_path), objs_json)
+        self._replay(journal_path, objs_json)
+        return objs_json
+
+    def load(self, cls: type,
+             streaming: bool = False) -> Iterator[Tuple[str, dict]]:
+        """Iterate over the stored (id, JSON dictionary) pairs of a class.
+        """
+        with self._compact_lock(cls.__name__):
+            with self._write_lock:
+                objs_json = self._read(cls)
+        yield from objs_json.items()
+
+    def save(self, cls: type, objs: dict):
+        """Save all the objects of a class and empty its journal.
+        """
+        s_class = cls.__name__
+        journal_path = self.journal_path(s_class)
+        with self._compact_lock(s_class):
+            with self._write_lock:
+                self._close_journal(s_class)
+                super().save(cls, objs)
+                for file_path in (journal_path, journal_path + '.old'):
+                    if path.exists(file_path):
+                        os.remove(file_path)
+
+    def commit(self, cls: type, objs: dict, changes: dict):
+        """Append the changes ({id: object or None}) made to the
+        objects of a class to its journal.
+        """
+        s_class = cls.__name__
+        lines = []
+        for obj_id, obj in changes.items():
+            record = {
+                'id': obj_id,
+                'obj': obj.to_json(True) if obj is not None else None,
+            }
+            lines.append(json.dumps(record) + '\n')
+        with self._write_lock:
+            journal = self._journal(s_class)
+            journal.write(''.join(lines))
+            journal.flush()
+            cur_time = time.monotonic()
+            if self.sync_mode == 'always' or (
+                    self.sync_mode == 'batch' and
+                    cur_time - self._last_sync[s_class] >= self.sync_interval):
+                os.fsync(journal.fileno())
+                self._last_sync[s_class] = cur_time
+            if journal.tell() < self.compact_size or \
+                    s_class in self._compacting:
+                return
+            self._compacting.add(s_class)
+        thread = threading.Thread(
+            target=self.compact, args=(cls,), daemon=True)
+        thread.start()
+
+    def compact(self, cls: type):
+        """Fold the journal of a class into its JSON file.
+        """
+        s_class = cls.__name__
+        journal_path = self.journal_path(s_class)
+        old_journal_path = '{}.old'.format(journal_path)
+        try:
+            with self._compact_lock(s_class):
+                with self._write_lock:
+                    self._close_journal(s_class)
+                    if not path.exists(journal_path):
+                        return
+                    if path.exists(old_journal_path):
+                        self._truncate_torn_line(old_journal_path)
+                        self._truncate_torn_line(journal_path)
+                        with open(old_journal_path, 'a') as old_journal, \
+                                open(journal_path, 'r') as journal:
+                            old_journal.write(journal.read())
+                        os.remove(journal_path)
+                    else:
+                        os.replace(journal_path, old_journal_path)
+                objs_json = dict(super().load(cls))
+                self._replay(old_journal_path, objs_json)
+                tmp_path = '{}.tmp'.format(self.file_path(s_class))
+                with open(tmp_path, 'w') as f:
+                    json.dump(objs_json, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.file_path(s_class))
+                os.remove(old_journal_path)
+        finally:
+            with self._write_lock:
+                self._compacting.discard(s_class)
+
+    def flush(self):
+        """Sync all the open journal files.
+        """
+        with self._write_lock:
+            for s_class, journal in self._journals.items():
+                journal.flush()
+                os.fsync(journal.fileno())
+                self._last_sync[s_class] = time.monotonic()
+
+    def close(self):
+        """Sync and close all the open journal files.
+        """
+        with self._write_lock:
+            for s_class in list(self._journals.keys()):
+                self._close_journal(s_class)
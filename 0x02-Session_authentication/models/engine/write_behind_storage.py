@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Write-behind storage engine module.
+"""
+import os
+import threading
+from typing import Iterator, Tuple
+
+
+class WriteBehindStorage:
+    """Storage engine wrapper that keeps track of the changes made to
+    each class and hands them over to the wrapped engine in batches,
+    after an interval or a number of changes, whichever comes first.
+    """
+
+    in_memory = True
+
+    def __init__(self, storage) -> None:
+        """Initializes a new WriteBehindStorage instance.
+        """
+        self.storage = storage
+        try:
+            self.flush_interval = float(
+                os.getenv('STORAGE_FLUSH_INTERVAL', '1'))
+        except Exception:
+            self.flush_interval = 1.0
+        try:
+            self.flush_size = int(os.getenv('STORAGE_FLUSH_SIZE', '1000'))
+        except Exception:
+            self.flush_size = 1000
+        self._dirty = {}
+        self._pending = 0
+        self._timer = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def load(self, cls: type,
+             streaming: bool = False) -> Iterator[Tuple[str, dict]]:
+        """Iterate over the stored (id, JSON dictionary) pairs of a class.
+        """
+        self.flush()
+        return self.storage.load(cls, streaming)
+
+    def save(self, cls: type, objs: dict):
+        """Save all the objects of a class.
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._dirty.pop(cls, None)
+            self.storage.save(cls, objs)
+
+    def commit(self, cls: type, objs: dict, changes: dict):
+        """Record the changes ({id: object or None}) made to the
+        objects of a class until the next flush.
+        """
+        with self._lock:
+            if cls not in self._dirty:
+                self._dirty[cls] = (objs, {})
+            self._dirty[cls][1].update(changes)
+            self._pending += len(changes)
+            is_full = self._pending >= self.flush_size
+            if not is_full and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if is_full:
+            self.flush()
+
+    def flush(self):
+        """Persist the pending changes of all classes.
+        """
+        with self._flush_lock:
+            with self._lock:
+                dirty, self._dirty, self._pending = self._dirty, {}, 0
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            for cls, (objs, changes) in dirty.items():
+                self.storage.commit(cls, objs, changes)
+            self.storage.flush()
+
+    def close(self):
+        """Persist the pending changes and release the resources.
+        """
+        self.flush()
+        self.storage.close()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Lazy objects module.
+"""
+from collections.abc import MutableMapping
+from typing import Callable, Iterator, List, Tuple, TypeVar
+
+
+class LazyObjects(MutableMapping):
+    """Dictionary of objects by ID that keeps the JSON dictionaries it
+    is loaded with and only builds an object when it is first accessed.
+
+    The JSON dictionaries are kept as (keys, values) tuples, with the
+    keys tuple shared between records that have the same keys.
+    """
+
+    def __init__(self, factory: Callable[..., TypeVar('Base')]) -> None:
+        """Initializes a new LazyObjects instance.
+        """
+        self._factory = factory
+        self._items = {}
+        self._keys = ()
+
+    def load(self, obj_id: str, obj_json: dict):
+        """Store the JSON dictionary of an object without building it.
+        """
+        keys = tuple(obj_json.keys())
+        if keys != self._keys:
+            self._keys = keys
+        self._items[obj_id] = (self._keys, tuple(obj_json.values()))
+
+    def peek(self, obj_id: str) -> object:
+        """Return the object or raw record stored under an ID
+        without building the object.
+        """
+        return self._items.get(obj_id)
+
+    def json_items(self) -> List[Tuple[str, dict]]:
+        """Return the (id, JSON dictionary) pairs of all the objects,
+        without building the ones that were never accessed.
+        """
+        result = []
+        for obj_id, obj in list(self._items.items()):
+            if type(obj) is tuple:
+                obj = dict(zip(*obj))
+            else:
+                obj = obj.to_json(True)
+            result.append((obj_id, obj))
+        return result
+
+    def __getitem__(self, obj_id: str) -> TypeVar('Base'):
+        """Return the object stored under an ID, building it if needed.
+        """
+        obj = self._items[obj_id]
+        if type(obj) is tuple:
+            obj = self._factory(**dict(zip(*obj)))
+            self._items[obj_id] = obj
+        return obj
+
+    def __setitem__(self, obj_id: str, obj: TypeVar('Base')):
+        """Store an object under an ID.
+        """
+        self._items[obj_id] = obj
+
+    def __delitem__(self, obj_id: str):
+        """Remove the object stored under an ID.
+        """
+        del self._items[obj_id]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the IDs of the objects.
+        """
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        """Return the number of objects.
+        """
+        return len(self._items)
+
+    def __contains__(self, obj_id: object) -> bool:
+        """Check if an object is stored under an ID.
+        """
+        return obj_id in self._items
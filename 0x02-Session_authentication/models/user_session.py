@@ -7,6 +7,8 @@ from models.base import Base
 class UserSession(Base):
     """User session class.
     """
+    __slots__ = ('user_id', 'session_id')
+    INDEXED_ATTRIBUTES = ('session_id', 'user_id')
 
     def __init__(self, *args: list, **kwargs: dict):
         """Initializes a User session instance.
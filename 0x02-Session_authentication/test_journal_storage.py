@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Tests for the journal storage engine.
+"""
+import os
+import tempfile
+import unittest
+
+from models.engine.journal_storage import JournalStorage
+
+
+class Item:
+    """A minimal stored object.
+    """
+
+    def __init__(self, id: str, name: str) -> None:
+        """Initializes a new Item instance.
+        """
+        self.id = id
+        self.name = name
+
+    def to_json(self, for_serialization: bool = False) -> dict:
+        """Converts the item to a JSON dictionary.
+        """
+        return {'id': self.id, 'name': self.name}
+
+
+class TestJournalStorage(unittest.TestCase):
+    """Checks that torn journal writes don't lose later records.
+    """
+
+    def setUp(self):
+        """Runs each test in an empty directory.
+        """
+        self.cwd = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)
+
+    def tearDown(self):
+        """Goes back to the original directory.
+        """
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def commit(self, storage: JournalStorage, *items: Item):
+        """Appends the given items to the journal.
+        """
+        storage.commit(Item, {}, {x.id: x for x in items})
+
+    def test_append_after_torn_line(self):
+        """A record appended after a torn line is kept.
+        """
+        storage = JournalStorage()
+        self.commit(storage, Item('1', 'a'), Item('2', 'b'), Item('3', 'c'))
+        storage.close()
+        with open(storage.journal_path('Item'), 'a') as f:
+            f.write('{"id": "4", "obj": {"id": "4", "na')
+        storage = JournalStorage()
+        self.commit(storage, Item('5', 'e'))
+        storage.close()
+        loaded = dict(JournalStorage().load(Item))
+        self.assertEqual(sorted(loaded), ['1', '2', '3', '5'])
+
+    def test_compaction_keeps_records_after_torn_line(self):
+        """Compacting a journal with a torn line in the middle keeps
+        the records that follow it.
+        """
+        with open(JournalStorage.JOURNAL_FORMAT.format('Item'), 'w') as f:
+            f.write('{"id": "1", "obj": {"id": "1", "name": "a"}}\n')
+            f.write('{"id": "2", "obj": {"id": "2", "na\n')
+            f.write('{"id": "3", "obj": {"id": "3", "name": "c"}}\n')
+        storage = JournalStorage()
+        storage.compact(Item)
+        self.assertFalse(os.path.exists(storage.journal_path('Item')))
+        loaded = dict(JournalStorage().load(Item))
+        self.assertEqual(sorted(loaded), ['1', '3'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,12 +4,29 @@
 from flask import Flask, jsonify, request, abort, redirect
 
 from auth import Auth
+from hashing import HashingOverloadedError
 
 
 app = Flask(__name__)
 AUTH = Auth()
 
 
+@app.teardown_appcontext
+def remove_session(exception) -> None:
+    """Releases the request's database session.
+    """
+    AUTH.remove_session()
+
+
+@app.errorhandler(HashingOverloadedError)
+def overloaded(error) -> str:
+    """Hashing service overloaded handler.
+    """
+    response = jsonify({"message": "service overloaded"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
 @app.route("/", methods=["GET"], strict_slashes=False)
 def index() -> str:
     """GET /
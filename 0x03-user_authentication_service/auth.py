@@ -1,19 +1,19 @@
 #!/usr/bin/env python3
 """A module for authentication-related routines.
 """
-import bcrypt
 from uuid import uuid4
 from typing import Union
 from sqlalchemy.orm.exc import NoResultFound
 
 from db import DB
 from user import User
+from hashing import get_hashing_service
 
 
 def _hash_password(password: str) -> bytes:
     """Hashes a password.
     """
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
+    return get_hashing_service().hash_password(password)
 
 
 def _generate_uuid() -> str:
@@ -31,6 +31,11 @@ class Auth:
         """
         self._db = DB()
 
+    def remove_session(self) -> None:
+        """Releases the database session of the current request.
+        """
+        self._db.remove_session()
+
     def register_user(self, email: str, password: str) -> User:
         """Adds a new user to the database.
         """
@@ -46,27 +51,29 @@ class Auth:
         user = None
         try:
             user = self._db.find_user_by(email=email)
-            if user is not None:
-                return bcrypt.checkpw(
-                    password.encode("utf-8"),
-                    user.hashed_password,
-                )
         except NoResultFound:
             return False
-        return False
+        if user is None:
+            return False
+        hashing_service = get_hashing_service()
+        if not hashing_service.check_password(password, user.hashed_password):
+            return False
+        try:
+            if hashing_service.needs_rehash(user.hashed_password):
+                self._db.update_user(
+                    user.id,
+                    hashed_password=_hash_password(password),
+                )
+        except Exception:
+            pass
+        return True
 
     def create_session(self, email: str) -> str:
         """Creates a new session for a user.
         """
-        user = None
-        try:
-            user = self._db.find_user_by(email=email)
-        except NoResultFound:
-            return None
-        if user is None:
-            return None
         session_id = _generate_uuid()
-        self._db.update_user(user.id, session_id=session_id)
+        if not self._db.update_user_by_email(email, session_id=session_id):
+            return None
         return session_id
 
     def get_user_from_session_id(self, session_id: str) -> Union[User, None]:
@@ -91,15 +98,9 @@ class Auth:
     def get_reset_password_token(self, email: str) -> str:
         """Generates a password reset token for a user.
         """
-        user = None
-        try:
-            user = self._db.find_user_by(email=email)
-        except NoResultFound:
-            user = None
-        if user is None:
-            raise ValueError()
         reset_token = _generate_uuid()
-        self._db.update_user(user.id, reset_token=reset_token)
+        if not self._db.update_user_by_email(email, reset_token=reset_token):
+            raise ValueError()
         return reset_token
 
     def update_password(self, reset_token: str, password: str) -> None:
@@ -1,14 +1,30 @@
 #!/usr/bin/env python3
 """DB module.
 """
-from sqlalchemy import create_engine, tuple_
+import os
+from sqlalchemy import create_engine, event, tuple_
 from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.orm.session import Session
 
-from user import Base, User
+from user import User
+from migrations import migrate
+
+
+USER_COLUMNS = frozenset(User.__table__.columns.keys())
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Sets up a new SQLite connection for concurrent access.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
 
 
 class DB:
@@ -18,19 +34,32 @@ class DB:
     def __init__(self) -> None:
         """Initialize a new DB instance.
         """
-        self._engine = create_engine("sqlite:///a.db", echo=False)
-        Base.metadata.drop_all(self._engine)
-        Base.metadata.create_all(self._engine)
-        self.__session = None
+        try:
+            pool_size = int(os.getenv("DB_POOL_SIZE", "5"))
+        except Exception:
+            pool_size = 5
+        self._engine = create_engine(
+            "sqlite:///a.db",
+            echo=False,
+            connect_args={"check_same_thread": False},
+            poolclass=QueuePool,
+            pool_size=max(pool_size, 1),
+            max_overflow=max(pool_size, 1) * 2,
+        )
+        event.listen(self._engine, "connect", set_sqlite_pragmas)
+        migrate(self._engine, os.getenv("DB_RESET", "") == "true")
+        self.__session = scoped_session(sessionmaker(bind=self._engine))
 
     @property
     def _session(self) -> Session:
-        """Memoized session object.
+        """The session object of the current thread.
         """
-        if self.__session is None:
-            DBSession = sessionmaker(bind=self._engine)
-            self.__session = DBSession()
-        return self.__session
+        return self.__session()
+
+    def remove_session(self) -> None:
+        """Closes the session object of the current thread.
+        """
+        self.__session.remove()
 
     def add_user(self, email: str, hashed_password: str) -> User:
         """Adds a new user to the database.
@@ -61,20 +90,34 @@ class DB:
             raise NoResultFound()
         return result
 
-    def update_user(self, user_id: int, **kwargs) -> None:
-        """Updates a user based on a given id.
+    def update_user(self, user_id: int, **kwargs) -> int:
+        """Updates a user based on a given id and returns the number
+        of updated users.
         """
-        user = self.find_user_by(id=user_id)
-        if user is None:
-            return
-        update_source = {}
-        for key, value in kwargs.items():
-            if hasattr(User, key):
-                update_source[getattr(User, key)] = value
-            else:
+        return self._update_users(User.id == user_id, **kwargs)
+
+    def update_user_by_email(self, email: str, **kwargs) -> int:
+        """Updates a user based on a given email and returns the
+        number of updated users.
+        """
+        return self._update_users(User.email == email, **kwargs)
+
+    def _update_users(self, criterion, **kwargs) -> int:
+        """Updates the users matching a criterion with a single
+        UPDATE statement.
+        """
+        for key in kwargs:
+            if key not in USER_COLUMNS:
                 raise ValueError()
-        self._session.query(User).filter(User.id == user_id).update(
-            update_source,
-            synchronize_session=False,
-        )
-        self._session.commit()
+        if not kwargs:
+            return 0
+        try:
+            count = self._session.query(User).filter(criterion).update(
+                kwargs,
+                synchronize_session=False,
+            )
+            self._session.commit()
+        except Exception:
+            self._session.rollback()
+            raise
+        return count
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""A module for hashing and checking passwords off the request threads.
+"""
+import os
+import time
+import bcrypt
+import threading
+from typing import Union
+from functools import lru_cache
+from statistics import median
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+MIN_ROUNDS, MAX_ROUNDS = (4, 31)
+SECURE_ROUNDS = 10
+PROBES = 5
+
+
+def calibrate_rounds(target_ms: float, probe_rounds: int = 8) -> int:
+    """Finds the highest bcrypt cost whose hashing time on this
+    host stays within the given number of milliseconds, going no
+    lower than SECURE_ROUNDS.
+    """
+    salt = bcrypt.gensalt(probe_rounds)
+    samples = []
+    for _ in range(PROBES):
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration", salt)
+        samples.append((time.perf_counter() - start) * 1000)
+    elapsed_ms = median(samples)
+    rounds = probe_rounds
+    while rounds < MAX_ROUNDS and elapsed_ms * 2 <= target_ms:
+        rounds, elapsed_ms = (rounds + 1, elapsed_ms * 2)
+    while rounds > MIN_ROUNDS and elapsed_ms > target_ms:
+        rounds, elapsed_ms = (rounds - 1, elapsed_ms / 2)
+    return max(rounds, SECURE_ROUNDS)
+
+
+@lru_cache(maxsize=None)
+def get_rounds() -> int:
+    """Retrieves the bcrypt cost to hash passwords with, either from
+    `BCRYPT_ROUNDS` or calibrated for `BCRYPT_TARGET_MS`.
+    """
+    try:
+        rounds = int(os.environ["BCRYPT_ROUNDS"])
+        return min(max(rounds, MIN_ROUNDS), MAX_ROUNDS)
+    except Exception:
+        pass
+    try:
+        target_ms = float(os.getenv("BCRYPT_TARGET_MS", "50"))
+    except Exception:
+        target_ms = 50
+    return calibrate_rounds(target_ms)
+
+
+def hash_cost(hashed_password: Union[bytes, str]) -> int:
+    """Retrieves the bcrypt cost a password was hashed with.
+    """
+    if isinstance(hashed_password, str):
+        hashed_password = hashed_password.encode("utf-8")
+    try:
+        return int(hashed_password.split(b"$")[2])
+    except Exception:
+        return 0
+
+
+class HashingOverloadedError(Exception):
+    """Raised when the hashing service has no room for more work.
+    """
+
+
+class HashingService:
+    """Runs bcrypt on a bounded pool of threads. bcrypt releases
+    the GIL, so the threads hash in parallel.
+    """
+
+    def __init__(
+            self, workers: int = None, queue_depth: int = None,
+            wait_timeout: float = 0, rounds: int = None,
+            ) -> None:
+        """Initializes a new HashingService instance.
+        """
+        self.rounds = rounds or get_rounds()
+        self.workers = max(workers or os.cpu_count() or 1, 1)
+        if queue_depth is None:
+            queue_depth = self.workers * 4
+        self.queue_depth = max(queue_depth, 0)
+        self.wait_timeout = wait_timeout
+        self._slots = threading.BoundedSemaphore(
+            self.workers + self.queue_depth)
+        self._executor = ThreadPoolExecutor(
+            self.workers, thread_name_prefix="bcrypt")
+
+    def submit(self, fn, *args) -> Future:
+        """Schedules a call on the pool, raising a
+        HashingOverloadedError when the queue is full.
+        """
+        if self.wait_timeout > 0:
+            acquired = self._slots.acquire(timeout=self.wait_timeout)
+        else:
+            acquired = self._slots.acquire(blocking=False)
+        if not acquired:
+            raise HashingOverloadedError()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda x: self._slots.release())
+        return future
+
+    def hash_password(self, password: str) -> bytes:
+        """Hashes a password on the pool.
+        """
+        return self.submit(
+            lambda x: bcrypt.hashpw(x, bcrypt.gensalt(self.rounds)),
+            password.encode("utf-8"),
+        ).result()
+
+    def check_password(self, password: str, hashed_password: bytes) -> bool:
+        """Checks a password against its hash on the pool.
+        """
+        return self.submit(
+            bcrypt.checkpw,
+            password.encode("utf-8"),
+            hashed_password,
+        ).result()
+
+    def needs_rehash(self, hashed_password: bytes) -> bool:
+        """Checks if a hashed password's cost is below the service's
+        one, or more than one round above it.
+        """
+        cost = hash_cost(hashed_password)
+        return cost < self.rounds or cost > self.rounds + 1
+
+    def shutdown(self) -> None:
+        """Waits for the scheduled calls and stops the pool.
+        """
+        self._executor.shutdown(wait=True)
+
+
+@lru_cache(maxsize=None)
+def get_hashing_service() -> HashingService:
+    """Retrieves the shared hashing service, configured with the
+    `HASHING_WORKERS`, `HASHING_QUEUE_DEPTH` and
+    `HASHING_WAIT_TIMEOUT` environment variables.
+    """
+    settings = {}
+    for name, key, cast in (
+            ("HASHING_WORKERS", "workers", int),
+            ("HASHING_QUEUE_DEPTH", "queue_depth", int),
+            ("HASHING_WAIT_TIMEOUT", "wait_timeout", float)):
+        try:
+            settings[key] = cast(os.environ[name])
+        except Exception:
+            pass
+    return HashingService(**settings)
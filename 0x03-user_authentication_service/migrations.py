@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""A module for migrating the database schema.
+"""
+from sqlalchemy.engine import Engine
+
+from user import Base
+
+
+def create_tables(connection) -> None:
+    """Creates the tables that don't exist yet.
+    """
+    Base.metadata.create_all(connection)
+
+
+MIGRATIONS = (
+    create_tables,
+    (
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email"
+        " ON users (email)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_session_id"
+        " ON users (session_id) WHERE session_id IS NOT NULL",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_reset_token"
+        " ON users (reset_token) WHERE reset_token IS NOT NULL",
+    ),
+)
+
+
+def migrate(engine: Engine, reset: bool = False) -> int:
+    """Applies the migrations a database hasn't seen yet and
+    returns its new schema version. The version is kept in SQLite's
+    `user_version` and every migration can be run again safely.
+    """
+    with engine.begin() as connection:
+        if reset:
+            Base.metadata.drop_all(connection)
+            connection.execute("PRAGMA user_version = 0")
+        version = connection.execute("PRAGMA user_version").scalar()
+        for number in range(version, len(MIGRATIONS)):
+            migration = MIGRATIONS[number]
+            if callable(migration):
+                migration(connection)
+            else:
+                for statement in migration:
+                    connection.execute(statement)
+            connection.execute("PRAGMA user_version = {}".format(number + 1))
+    return max(version, len(MIGRATIONS))
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """The `user` model's module.
 """
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String
 from sqlalchemy.ext.declarative import declarative_base
 
 
@@ -17,3 +17,14 @@ class User(Base):
     hashed_password = Column(String(250), nullable=False)
     session_id = Column(String(250), nullable=True)
     reset_token = Column(String(250), nullable=True)
+    __table_args__ = (
+        Index("ix_users_email", email, unique=True),
+        Index(
+            "ix_users_session_id", session_id, unique=True,
+            sqlite_where=session_id.isnot(None),
+        ),
+        Index(
+            "ix_users_reset_token", reset_token, unique=True,
+            sqlite_where=reset_token.isnot(None),
+        ),
+    )